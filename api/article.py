@@ -1,11 +1,50 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, abort
 from models.article import Article
 from models.folder import Folder
 from extensions import db
+from services.write_buffer import article_write_buffer
+from services.changes import record_change
+from services.folder_index import folder_index
+from services.article_cache import article_cache
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 article_api = Blueprint('article', __name__)
 
+ARTICLE_FIELDS = {'id', 'title', 'content', 'excerpt', 'word_count', 'outline',
+                  'user_id', 'parent_id', 'created_at', 'updated_at'}
+BATCH_MAX_IDS = 200
+
+def _serialize_article(article, include_content=True):
+    data = {
+        'id': article.id,
+        'title': article.title,
+        'excerpt': article.excerpt,
+        'word_count': article.word_count,
+        'outline': article.outline,
+        'user_id': article.user_id,
+        'parent_id': article.parent_id,
+        'created_at': article.created_at.isoformat(),
+        'updated_at': article.updated_at.isoformat() if article.updated_at else None,
+    }
+    if include_content:
+        data['content'] = article.content
+    return data
+
+def load_articles(article_ids, include_content=True):
+    """批量读取文章，优先命中缓存，未命中的用一条 IN 查询补齐，返回 {id: dict}"""
+    fields = {'content'} if include_content else set()
+    found = article_cache.get_many(article_ids, fields)
+    missing = [article_id for article_id in article_ids if article_id not in found]
+    if missing:
+        generation = article_cache.generation
+        query = Article.query.filter(Article.id.in_(missing))
+        if include_content:
+            query = query.options(db.undefer(Article.content))
+        loaded = [_serialize_article(article, include_content) for article in query.all()]
+        article_cache.put_many(loaded, generation)
+        found.update((data['id'], data) for data in loaded)
+    return found
+
 # 创建文章
 @article_api.route('/create', methods=['POST'])
 @jwt_required()
@@ -17,8 +56,17 @@ def create_article():
     
     try:
         if parent_id:
+            try:
+                parent_id = int(parent_id)
+            except (TypeError, ValueError):
+                return jsonify({
+                    'code': 400,
+                    'message': 'parent_id 必须为整数',
+                    'data': None
+                }), 200
+
             # 如果指定了父文件夹，验证其存在性
-            parent_folder = Folder.query.get(parent_id)
+            parent_folder = folder_index.get().get(parent_id)
             if not parent_folder:
                 return jsonify({
                     'code': 404,
@@ -27,21 +75,26 @@ def create_article():
                 }), 200
         else:
             # 如果没有指定父文件夹，使用根文件夹
-            parent_folder = Folder.query.filter_by(is_root=True).first()
+            parent_folder = folder_index.get().root()
             if not parent_folder:
                 # 如果根文件夹不存在，创建一个
                 parent_folder = Folder(name="默认文件夹", is_root=True)
                 db.session.add(parent_folder)
+                db.session.flush()
+                record_change('folder', parent_folder.id, 'create', None, {'name': parent_folder.name})
                 db.session.commit()
             parent_id = parent_folder.id
         
         new_article = Article(
             title=title,
-            content='',
             parent_id=parent_id,
             user_id=user_id
         )
+        new_article.set_content('')
         db.session.add(new_article)
+        Folder.adjust_counts(parent_id, articles=1)
+        db.session.flush()
+        record_change('article', new_article.id, 'create', parent_id, {'title': new_article.title})
         db.session.commit()
         
         return jsonify({
@@ -68,17 +121,25 @@ def create_article():
 def get_articles():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    # content=0 时不读取正文，仅返回摘要等派生字段
+    include_content = request.args.get('content', 1, type=int) != 0
     
-    articles = Article.query.paginate(page=page, per_page=per_page)
+    query = Article.query
+    if include_content:
+        query = query.options(db.undefer(Article.content))
+    articles = query.paginate(page=page, per_page=per_page)
     
     return jsonify({
-        'data': [{
+        'data': [article_write_buffer.overlay(article.id, {
             'id': article.id,
             'title': article.title,
-            'content': article.content,
+            'content': article.content if include_content else None,
+            'excerpt': article.excerpt,
+            'word_count': article.word_count,
+            'outline': article.outline,
             'user_id': article.user_id,
             'created_at': article.created_at.isoformat()
-        } for article in articles.items],
+        }, include_content=include_content) for article in articles.items],
         'total': articles.total,
         'pages': articles.pages,
         'current_page': articles.page,
@@ -88,19 +149,63 @@ def get_articles():
 # 获取单个文章
 @article_api.route('/<int:article_id>', methods=["GET"])
 def get_article(article_id):
-    article = Article.query.get_or_404(article_id)
+    article = load_articles([article_id]).get(article_id)
+    if article is None:
+        abort(404)
     
     return jsonify({
-        'data': {
-            'id': article.id,
-            'title': article.title,
-            'content': article.content,
-            'user_id': article.user_id,
-            'created_at': article.created_at.isoformat(),
-        },
+        'data': article_write_buffer.overlay(article_id, dict(article)),
         'code': 200
     })
 
+# 批量获取文章
+@article_api.route('/batch', methods=["GET", "POST"])
+def get_articles_batch():
+    """一次获取多篇文章
+    请求参数（GET 为查询字符串，POST 为 JSON）:
+        ids: 文章ID列表，GET 时以逗号分隔，如 ids=1,2,3
+        fields: 需要返回的字段，可选，GET 时以逗号分隔；不含 content 时不读取正文
+    返回的 data 与 ids 顺序一致，不存在的文章返回 {'id': id, 'not_found': True}
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'code': 400, 'data': None, 'message': '请求体必须为 JSON 对象'}), 400
+        raw_ids = data.get('ids') or []
+        fields = data.get('fields')
+        if not isinstance(raw_ids, list):
+            return jsonify({'code': 400, 'data': None, 'message': 'ids 必须为整数列表'}), 400
+        if fields is not None and (not isinstance(fields, list)
+                                   or not all(isinstance(field, str) for field in fields)):
+            return jsonify({'code': 400, 'data': None, 'message': 'fields 必须为字符串列表'}), 400
+    else:
+        raw_ids = [item for item in request.args.get('ids', '').split(',') if item.strip()]
+        fields = request.args.get('fields')
+        fields = fields.split(',') if fields else None
+
+    try:
+        article_ids = list(dict.fromkeys(int(article_id) for article_id in raw_ids))
+    except (TypeError, ValueError):
+        return jsonify({'code': 400, 'data': None, 'message': 'ids 必须为整数列表'}), 400
+    if not article_ids:
+        return jsonify({'code': 400, 'data': None, 'message': 'ids 不能为空'}), 400
+    if len(article_ids) > BATCH_MAX_IDS:
+        return jsonify({'code': 400, 'data': None, 'message': f'一次最多获取 {BATCH_MAX_IDS} 篇文章'}), 400
+
+    fields = set(fields) & ARTICLE_FIELDS | {'id'} if fields else ARTICLE_FIELDS
+    found = load_articles(article_ids, include_content='content' in fields)
+
+    items = []
+    for article_id in article_ids:
+        article = found.get(article_id)
+        if article is None:
+            items.append({'id': article_id, 'not_found': True})
+            continue
+        article = article_write_buffer.overlay(article_id, dict(article))
+        items.append({key: value for key, value in article.items() if key in fields})
+
+    return jsonify({'code': 200, 'data': items, 'message': '获取成功'})
+
 # 更新文章
 @article_api.route('/<int:article_id>', methods=["PUT"])
 @jwt_required()
@@ -116,8 +221,41 @@ def update_article(article_id):
         return jsonify({'message': '没有权限修改此文章'}), 403
     
     data = request.get_json()
+
+    # 移动文章到其他文件夹，同步维护两侧文件夹的文章计数
+    new_parent_id = data.get('parent_id')
+    if new_parent_id:
+        try:
+            new_parent_id = int(new_parent_id)
+        except (TypeError, ValueError):
+            new_parent_id = None
+        if not new_parent_id or new_parent_id < 0:
+            return jsonify({'message': 'parent_id 必须为正整数', 'code': 400}), 400
+    moved = bool(new_parent_id) and new_parent_id != article.parent_id
+    if moved:
+        if not folder_index.get().get(new_parent_id):
+            return jsonify({'message': '目标文件夹不存在', 'code': 404}), 404
+        Folder.adjust_counts(article.parent_id, articles=-1)
+        Folder.adjust_counts(new_parent_id, articles=1)
+        record_change('article', article.id, 'move', new_parent_id, {'old_parent_id': article.parent_id})
+        article.parent_id = new_parent_id
+
+    # 开启写回缓冲时，先与缓冲中的版本合并，由后台线程批量落盘
+    if article_write_buffer.enabled:
+        article_write_buffer.put(
+            article.id,
+            {key: data[key] for key in ('title', 'content') if key in data},
+            {'title': article.title, 'content': article.content}
+        )
+        if moved:
+            db.session.commit()
+        return jsonify({'message': '文章更新成功', 'code': 200})
+
     article.title = data.get('title', article.title)
-    article.content = data.get('content', article.content)
+    if 'content' in data:
+        article.set_content(data['content'])
+    if 'title' in data or 'content' in data:
+        record_change('article', article.id, 'update', article.parent_id, {'title': article.title})
     
     db.session.commit()
     
@@ -135,6 +273,9 @@ def delete_article(article_id):
     if str(article.user_id) != str(current_user_id):
         return jsonify({'message': '没有权限删除此文章'}), 403
     
+    article_write_buffer.discard(article.id)
+    Folder.adjust_counts(article.parent_id, articles=-1)
+    record_change('article', article.id, 'delete', article.parent_id)
     db.session.delete(article)
     db.session.commit()
     
@@ -0,0 +1,98 @@
+import json
+import time
+
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required
+from extensions import db
+from services.changes import changes_since, CHANGE_GAP_TIMEOUT
+
+change_api = Blueprint('change', __name__)
+
+def _serialize_change(change):
+    return {
+        'seq': change.seq,
+        'entity_type': change.entity_type,
+        'entity_id': change.entity_id,
+        'action': change.action,
+        'parent_id': change.parent_id,
+        'data': change.data,
+        'created_at': change.created_at.isoformat() if change.created_at else None
+    }
+
+@change_api.route('', methods=["GET"])
+@jwt_required()
+def get_changes():
+    """增量同步：返回 seq 大于 since 的变更
+    请求参数:
+        since: 客户端已同步到的 seq，首次同步传 0
+        limit: 单次返回的最大条数，默认 500
+    客户端应循环请求直到 has_more 为 false，并保存 last_seq 作为下次的 since。
+    尚未提交的较小 seq 之后的变更会暂缓返回，见 services/changes.py 中的 changes_since。
+    """
+    since = request.args.get('since', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 500, type=int), 1000))
+    gap_timeout = current_app.config.get('CHANGE_GAP_TIMEOUT', CHANGE_GAP_TIMEOUT)
+
+    try:
+        changes = changes_since(since, limit + 1, gap_timeout)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return jsonify({
+            'code': 200,
+            'data': {
+                'changes': [_serialize_change(change) for change in changes],
+                'last_seq': changes[-1].seq if changes else since,
+                'has_more': has_more
+            },
+            'message': '获取成功'
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'code': 500,
+            'data': None,
+            'message': f'获取变更失败: {str(e)}'
+        }), 200
+
+@change_api.route('/stream', methods=["GET"])
+@jwt_required()
+def stream_changes():
+    """以 server-sent events 推送新的变更
+
+    每个连接会占用一个 worker 线程，因此默认关闭（CHANGE_STREAM_ENABLED），
+    且连接在 CHANGE_STREAM_TIMEOUT 秒后主动结束，由客户端携带 Last-Event-ID 重连。
+    """
+    if not current_app.config.get('CHANGE_STREAM_ENABLED', False):
+        return jsonify({
+            'code': 404,
+            'data': None,
+            'message': '变更推送未开启，请使用 GET /changes 轮询'
+        }), 404
+
+    since = request.headers.get('Last-Event-ID', type=int) or request.args.get('since', 0, type=int)
+    timeout = current_app.config.get('CHANGE_STREAM_TIMEOUT', 55)
+    poll_interval = current_app.config.get('CHANGE_STREAM_POLL_INTERVAL', 1)
+    gap_timeout = current_app.config.get('CHANGE_GAP_TIMEOUT', CHANGE_GAP_TIMEOUT)
+
+    def generate(last_seq):
+        deadline = time.monotonic() + timeout
+        yield 'retry: 3000\n\n'
+        while time.monotonic() < deadline:
+            changes = changes_since(last_seq, gap_timeout=gap_timeout)
+            for change in changes:
+                last_seq = change.seq
+                payload = json.dumps(_serialize_change(change), ensure_ascii=False)
+                yield f'id: {change.seq}\ndata: {payload}\n\n'
+            if not changes:
+                # 心跳，防止代理断开空闲连接
+                yield ': ping\n\n'
+            # 结束当前只读事务，下一轮才能读到其他连接新提交的数据
+            db.session.rollback()
+            time.sleep(poll_interval)
+
+    return Response(
+        stream_with_context(generate(since)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
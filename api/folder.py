@@ -1,13 +1,165 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
+import base64
+import json
 from typing import List, Union, Optional
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.folder import Folder
 from models.article import Article
+from models.types import CompressedText
 from extensions import db
+from services.jobs import enqueue, job_handler
+from services.changes import record_change
+from services.folder_index import folder_index
+from services.article_cache import mark_articles_changed
+from services.write_buffer import article_write_buffer
 
 folder_api = Blueprint('folder', __name__)
 
+def _folder_child_columns():
+    return [
+        Folder.id,
+        Folder.name,
+        db.literal('FOLDER').label('type'),
+        Folder.created_at,
+        ((Folder.child_folder_count + Folder.article_count) > 0).label('has_children'),
+        Folder.child_folder_count,
+        Folder.article_count,
+        # 指定类型，使 UNION 结果按 CompressedText 解码文章正文
+        db.literal(None, type_=CompressedText()).label('content'),
+        db.literal(None).label('excerpt'),
+        db.literal(None).label('word_count'),
+        Folder.updated_at
+    ]
+
+def _article_child_columns(include_content=True):
+    return [
+        Article.id,
+        Article.title.label('name'),
+        db.literal('FILE').label('type'),
+        Article.created_at,
+        db.literal(False).label('has_children'),
+        db.literal(0).label('child_folder_count'),
+        db.literal(0).label('article_count'),
+        Article.content if include_content else db.literal(None).label('content'),
+        Article.excerpt,
+        Article.word_count,
+        Article.updated_at
+    ]
+
+def _query_direct_children(folder_id, include_content=True):
+    """查询文件夹的直接子项（子文件夹 + 文章），按创建时间排序
+
+    include_content 为 False 时不读取文章正文，只返回摘要与字数。
+    """
+    union_query = db.union_all(
+        db.select(*_folder_child_columns()).where(Folder.parent_id == folder_id),
+        db.select(*_article_child_columns(include_content)).where(Article.parent_id == folder_id)
+    ).subquery()
+
+    return db.session.query(union_query).order_by(union_query.c.created_at).all()
+
+# 子项排序字段 -> (文件夹列, 文章列)，均有 (parent_id, 排序列, id) 索引
+CHILD_SORT_FIELDS = {
+    'name': (Folder.name, Article.title),
+    'created_at': (Folder.created_at, Article.created_at),
+    'updated_at': (Folder.updated_at, Article.updated_at),
+}
+CHILD_PAGE_MAX_LIMIT = 200
+
+def _encode_cursor(item):
+    sort_key = item.sort_key.isoformat() if isinstance(item.sort_key, datetime) else item.sort_key
+    raw = json.dumps([item.sort_rank, sort_key, item.sort_kind, item.id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor, sort):
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        rank, sort_key, kind, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if sort != 'name':
+            sort_key = datetime.fromisoformat(sort_key)
+        return int(rank), sort_key, int(kind), int(item_id)
+    except Exception as e:
+        raise ValueError('无效的游标') from e
+
+def _query_children_page(folder_id, sort='created_at', descending=False, folders_first=True,
+                         cursor=None, limit=50, include_content=True):
+    """按游标分页查询直接子项
+
+    排序为 (sort_rank, sort_key, sort_kind, id)：sort_kind 文件夹为 0、文章为 1，
+    folders_first 时 sort_rank 等于 sort_kind（始终升序），否则为 0。
+    游标条件与 LIMIT 分别下推到文件夹和文章两个分支，各自走 (parent_id, 排序列, id) 索引，
+    每页代价与文件夹大小无关。
+    """
+    after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+    branches = []
+    for kind, (model, columns, key) in enumerate([
+        (Folder, _folder_child_columns(), CHILD_SORT_FIELDS[sort][0]),
+        (Article, _article_child_columns(include_content), CHILD_SORT_FIELDS[sort][1]),
+    ]):
+        rank = kind if folders_first else 0
+        condition = model.parent_id == folder_id
+        if cursor is not None:
+            cursor_rank, cursor_key, cursor_kind, cursor_id = cursor
+            if rank < cursor_rank:
+                continue
+            if rank == cursor_rank:
+                if kind == cursor_kind:
+                    condition = db.and_(condition, db.or_(
+                        after(key, cursor_key),
+                        db.and_(key == cursor_key, after(model.id, cursor_id))
+                    ))
+                elif after(kind, cursor_kind):
+                    condition = db.and_(condition, db.or_(after(key, cursor_key), key == cursor_key))
+                else:
+                    condition = db.and_(condition, after(key, cursor_key))
+
+        order = (key.desc(), model.id.desc()) if descending else (key.asc(), model.id.asc())
+        branches.append(
+            db.select(
+                *columns,
+                key.label('sort_key'),
+                db.literal(rank).label('sort_rank'),
+                db.literal(kind).label('sort_kind')
+            ).where(condition).order_by(*order).limit(limit + 1).subquery()
+        )
+
+    if not branches:
+        return [], None
+
+    selects = [db.select(branch) for branch in branches]
+    page_query = (db.union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+    direction = db.desc if descending else db.asc
+    items = db.session.query(page_query).order_by(
+        page_query.c.sort_rank.asc(),
+        direction(page_query.c.sort_key),
+        direction(page_query.c.sort_kind),
+        direction(page_query.c.id)
+    ).limit(limit + 1).all()
+
+    next_cursor = _encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return items[:limit], next_cursor
+
+def _serialize_child(item, include_content=True):
+    data = {
+        'id': item.id,
+        'name': item.name,
+        'type': item.type,
+        'has_children': bool(item.has_children),
+        'created_at': item.created_at.isoformat() if item.created_at else None,
+        'updated_at': item.updated_at.isoformat() if item.updated_at else None,
+        'content': item.content if item.type == 'FILE' else None
+    }
+    if item.type == 'FOLDER':
+        data['child_folder_count'] = item.child_folder_count
+        data['article_count'] = item.article_count
+    else:
+        data['excerpt'] = item.excerpt
+        data['word_count'] = item.word_count
+        # 开启写回缓冲时，列表中的文章同样以缓冲中的版本为准
+        article_write_buffer.overlay(item.id, data, title_key='name', include_content=include_content)
+    return data
+
 @folder_api.route('/', methods=["GET"])
 def hello():
     """健康检查接口"""
@@ -39,26 +191,35 @@ def create_folder():
             'message': '文件夹名称不能为空'
         }), 200
 
+    try:
+        parent_id = int(parent_id)
+    except (TypeError, ValueError):
+        parent_id = None
+    if not parent_id or parent_id < 0:
+        return jsonify({
+            'code': 400,
+            'data': None,
+            'message': 'parent_id 必须为正整数'
+        }), 200
+
     try:
         new_folder = Folder(name=folder_name)
-        
-        if parent_id:
-            parent_folder = Folder.query.get(parent_id)
-            if not parent_folder:
-                return jsonify({
-                    'code': 500,
-                    'data': None,
-                    'message': '父文件夹不存在'
-                }), 200
-            
-            if not parent_folder.add_child(new_folder):
-                return jsonify({
-                    'code': 500,
-                    'data': None,
-                    'message': '不能创建循环引用的文件夹结构'
-                }), 200
+
+        parent_folder = folder_index.get().get(parent_id)
+        if not parent_folder:
+            return jsonify({
+                'code': 500,
+                'data': None,
+                'message': '父文件夹不存在'
+            }), 200
+
+        # 新建的文件夹没有子项，不会形成循环
+        new_folder.parent_id = parent_folder.id
 
         db.session.add(new_folder)
+        Folder.adjust_counts(parent_folder.id, child_folders=1)
+        db.session.flush()
+        record_change('folder', new_folder.id, 'create', parent_folder.id, {'name': new_folder.name})
         db.session.commit()
 
         return jsonify({
@@ -81,9 +242,13 @@ def create_folder():
 
 @folder_api.route('/<int:folder_id>', methods=["GET"])
 def get_folder(folder_id):
-    """获取指定文件夹详情及其直接子项（仅一层）"""
+    """获取指定文件夹详情及其直接子项（仅一层）
+    请求参数:
+        content: 传 0 时子项不返回正文，仅返回摘要与字数
+    """
     try:
-        folder = Folder.query.get(folder_id)
+        # 与 /children、/path 一致，以文件夹树索引判断是否存在，脱离父级等待清理的文件夹视为不存在
+        folder = db.session.get(Folder, folder_id) if folder_index.get().get(folder_id) else None
         if not folder:
             return jsonify({
                 'code': 500,
@@ -91,38 +256,8 @@ def get_folder(folder_id):
                 'message': '文件夹不存在'
             }), 200
 
-        # 修改联合查询，只包含现有字段
-        union_query = db.union_all(
-            db.select(
-                Folder.id,
-                Folder.name,
-                db.literal('FOLDER').label('type'),
-                Folder.created_at,
-                db.literal(True).label('has_children'),
-                db.literal(None).label('content'),
-                db.literal(None).label('updated_at')
-            ).where(Folder.parent_id == folder_id),
-            db.select(
-                Article.id,
-                Article.title.label('name'),
-                db.literal('FILE').label('type'),
-                Article.created_at,
-                db.literal(False).label('has_children'),
-                Article.content,
-                Article.updated_at
-            ).where(Article.parent_id == folder_id)
-        ).subquery()
-
-        # 查询子查询，只包含现有字段
-        direct_children = db.session.query(
-            union_query.c.id,
-            union_query.c.name,
-            union_query.c.type,
-            union_query.c.created_at,
-            union_query.c.has_children,
-            union_query.c.content,
-            union_query.c.updated_at
-        ).order_by(union_query.c.created_at).all()
+        include_content = request.args.get('content', 1, type=int) != 0
+        direct_children = _query_direct_children(folder.id, include_content)
 
         return jsonify({
             'code': 200,
@@ -131,15 +266,73 @@ def get_folder(folder_id):
                 'name': folder.name,
                 'created_at': folder.created_at.isoformat(),
                 'updated_at': folder.updated_at.isoformat(),
-                'children': [{
-                    'id': item.id,
-                    'name': item.name,
-                    'type': item.type,
-                    'has_children': item.has_children,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'updated_at': item.updated_at.isoformat() if item.updated_at else None,
-                    'content': item.content if item.type == 'FILE' else None
-                } for item in direct_children]
+                'child_folder_count': folder.child_folder_count,
+                'article_count': folder.article_count,
+                'has_children': folder.has_children,
+                'children': [_serialize_child(item, include_content) for item in direct_children]
+            },
+            'message': '获取成功'
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'code': 500,
+            'data': None,
+            'message': f'获取失败: {str(e)}'
+        }), 200
+
+@folder_api.route('/<int:folder_id>/children', methods=["GET"])
+def get_folder_children(folder_id):
+    """分页获取文件夹的直接子项
+    请求参数:
+        limit: 每页条数，默认 50，最大 200
+        cursor: 上一页返回的 next_cursor，首页不传
+        sort: 排序字段 name / created_at / updated_at，默认 created_at
+        order: asc / desc，默认 asc
+        folders_first: 是否文件夹在前，默认 1
+        content: 传 0 时不返回文章正文
+    翻页时 sort、order、folders_first 需与首页保持一致。
+    """
+    sort = request.args.get('sort', 'created_at')
+    if sort not in CHILD_SORT_FIELDS:
+        return jsonify({
+            'code': 400,
+            'data': None,
+            'message': f'不支持的排序字段: {sort}'
+        }), 200
+
+    limit = max(1, min(request.args.get('limit', 50, type=int), CHILD_PAGE_MAX_LIMIT))
+    descending = request.args.get('order', 'asc') == 'desc'
+    folders_first = request.args.get('folders_first', 1, type=int) != 0
+    include_content = request.args.get('content', 1, type=int) != 0
+
+    try:
+        cursor = request.args.get('cursor')
+        cursor = _decode_cursor(cursor, sort) if cursor else None
+    except ValueError as e:
+        return jsonify({
+            'code': 400,
+            'data': None,
+            'message': str(e)
+        }), 200
+
+    if not folder_index.get().get(folder_id):
+        return jsonify({
+            'code': 404,
+            'data': None,
+            'message': '文件夹不存在'
+        }), 200
+
+    try:
+        items, next_cursor = _query_children_page(
+            folder_id, sort, descending, folders_first, cursor, limit, include_content)
+
+        return jsonify({
+            'code': 200,
+            'data': {
+                'children': [_serialize_child(item, include_content) for item in items],
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             },
             'message': '获取成功'
         }), 200
@@ -154,23 +347,38 @@ def get_folder(folder_id):
 @folder_api.route('/<int:folder_id>', methods=["PUT"])
 @jwt_required()
 def update_folder(folder_id):
-    """更新文件夹名称
+    """更新文件夹名称或移动文件夹
     参数:
         folder_id: 文件夹ID
     请求参数:
         name: 新的文件夹名称
+        parent_id: 新的父文件夹ID（可选，用于移动）
     """
     data = request.json
     new_name = data.get('name')
+    new_parent_id = data.get('parent_id')
 
-    if not new_name:
+    if not new_name and not new_parent_id:
         return jsonify({
             'code': 400,
             'data': None,
             'message': '文件夹名称不能为空'
         }), 200
 
-    folder = Folder.query.get(folder_id)
+    if new_parent_id:
+        try:
+            new_parent_id = int(new_parent_id)
+        except (TypeError, ValueError):
+            new_parent_id = None
+        if not new_parent_id or new_parent_id < 0:
+            return jsonify({
+                'code': 400,
+                'data': None,
+                'message': 'parent_id 必须为正整数'
+            }), 200
+
+    # 脱离父级等待清理的文件夹不能再改名或移回树中
+    folder = db.session.get(Folder, folder_id) if folder_index.get().get(folder_id) else None
     if not folder:
         return jsonify({
             'code': 404,
@@ -179,7 +387,34 @@ def update_folder(folder_id):
         }), 200
 
     try:
-        folder.update_name(new_name)
+        if new_name:
+            folder.update_name(new_name)
+            record_change('folder', folder.id, 'update', folder.parent_id, {'name': new_name})
+
+        if new_parent_id and new_parent_id != folder.parent_id:
+            index = folder_index.get()
+            new_parent = index.get(new_parent_id)
+            if not new_parent:
+                return jsonify({
+                    'code': 404,
+                    'data': None,
+                    'message': '目标文件夹不存在'
+                }), 200
+
+            old_parent_id = folder.parent_id
+            if folder.is_root or index.would_create_cycle(folder.id, new_parent.id):
+                db.session.rollback()
+                return jsonify({
+                    'code': 500,
+                    'data': None,
+                    'message': '不能创建循环引用的文件夹结构'
+                }), 200
+
+            folder.parent_id = new_parent.id
+            Folder.adjust_counts(old_parent_id, child_folders=-1)
+            Folder.adjust_counts(new_parent.id, child_folders=1)
+            record_change('folder', folder.id, 'move', new_parent.id, {'old_parent_id': old_parent_id})
+
         db.session.commit()
         
         return jsonify({
@@ -187,6 +422,7 @@ def update_folder(folder_id):
             'data': {
                 'id': folder.id,
                 'name': folder.name,
+                'parent_id': folder.parent_id,
                 'updated_at': folder.updated_at.isoformat()
             },
             'message': '更新成功'
@@ -217,7 +453,19 @@ def delete_folder(folder_id):
         }), 200
 
     try:
+        child_ids = [child_id for (child_id,) in
+                     db.session.query(Folder.id).filter(Folder.parent_id == folder.id).all()]
+
+        Folder.adjust_counts(folder.parent_id, child_folders=-1)
+        # 直接子文章同步删除，子文件夹先脱离父级，整棵子树交给后台任务清理
+        mark_articles_changed([article_id for (article_id,) in
+                               db.session.query(Article.id).filter(Article.parent_id == folder.id).all()])
+        Article.query.filter(Article.parent_id == folder.id).delete(synchronize_session=False)
         db.session.delete(folder)
+        # 客户端收到文件夹的 delete 后应自行移除整棵子树
+        record_change('folder', folder.id, 'delete', folder.parent_id)
+        if child_ids:
+            enqueue('folder.purge', {'folder_ids': child_ids})
         db.session.commit()
         
         return jsonify({
@@ -234,13 +482,36 @@ def delete_folder(folder_id):
             'message': f'删除失败: {str(e)}'
         }), 200
 
+@job_handler('folder.purge')
+def purge_folders(payload):
+    """后台任务：删除已脱离父级的文件夹子树及其中的文章"""
+    pending = db.session.query(Folder.id, Folder.parent_id).filter(
+        Folder.id.in_(payload.get('folder_ids', []))).all()
+    subtree = []
+    while pending:
+        for folder_id, parent_id in pending:
+            subtree.append(folder_id)
+            # 写入变更记录，使各进程的文件夹树索引随之刷新
+            record_change('folder', folder_id, 'delete', parent_id)
+        pending = db.session.query(Folder.id, Folder.parent_id).filter(
+            Folder.parent_id.in_([folder_id for folder_id, _ in pending])).all()
+
+    if not subtree:
+        return
+    mark_articles_changed([article_id for (article_id,) in
+                           db.session.query(Article.id).filter(Article.parent_id.in_(subtree)).all()])
+    Article.query.filter(Article.parent_id.in_(subtree)).delete(synchronize_session=False)
+    Folder.query.filter(Folder.id.in_(subtree)).update({'parent_id': None}, synchronize_session=False)
+    Folder.query.filter(Folder.id.in_(subtree)).delete(synchronize_session=False)
+
 @folder_api.route('/init', methods=["POST"])
 @jwt_required()
 def init_root_folder():
     """初始化根文件夹，如果根文件夹不存在则创建"""
     try:
         # 使用is_root字段来标识根文件夹，而不是依赖name
-        root_folder = Folder.query.filter_by(is_root=True).first()
+        root = folder_index.get().root()
+        root_folder = db.session.get(Folder, root.id) if root else None
         
         if root_folder:
             return jsonify({
@@ -256,6 +527,8 @@ def init_root_folder():
         # 创建新的根文件夹，设置is_root为True
         root_folder = Folder(name="默认文件夹", is_root=True)
         db.session.add(root_folder)
+        db.session.flush()
+        record_change('folder', root_folder.id, 'create', None, {'name': root_folder.name})
         db.session.commit()
         
         return jsonify({
@@ -279,43 +552,17 @@ def init_root_folder():
 @folder_api.route('/list', methods=["GET"])
 @jwt_required()
 def get_folder_list():
-    """获取顶层文件夹列表（仅包含根目录和一级文件夹）"""
+    """获取顶层文件夹列表（仅包含根目录和一级文件夹）
+    请求参数:
+        content: 传 0 时子项不返回正文，仅返回摘要与字数
+    """
     try:
-        root_folder = Folder.query.filter_by(is_root=True).first()
+        root = folder_index.get().root()
+        root_folder = db.session.get(Folder, root.id) if root else None
         
         if root_folder:
-            # 修改联合查询，只包含现有字段
-            union_query = db.union_all(
-                db.select(
-                    Folder.id,
-                    Folder.name,
-                    db.literal('FOLDER').label('type'),
-                    Folder.created_at,
-                    db.literal(True).label('has_children'),
-                    db.literal(None).label('content'),
-                    db.literal(None).label('updated_at')
-                ).where(Folder.parent_id == root_folder.id),
-                db.select(
-                    Article.id,
-                    Article.title.label('name'),
-                    db.literal('FILE').label('type'),
-                    Article.created_at,
-                    db.literal(False).label('has_children'),
-                    Article.content,
-                    Article.updated_at
-                ).where(Article.parent_id == root_folder.id)
-            ).subquery()
-
-            # 查询子查询，只包含现有字段
-            direct_children = db.session.query(
-                union_query.c.id,
-                union_query.c.name,
-                union_query.c.type,
-                union_query.c.created_at,
-                union_query.c.has_children,
-                union_query.c.content,
-                union_query.c.updated_at
-            ).order_by(union_query.c.created_at).all()
+            include_content = request.args.get('content', 1, type=int) != 0
+            direct_children = _query_direct_children(root_folder.id, include_content)
 
             root_data = {
                 'id': root_folder.id,
@@ -323,15 +570,10 @@ def get_folder_list():
                 'created_at': root_folder.created_at.isoformat(),
                 'updated_at': root_folder.updated_at.isoformat(),
                 'is_root': True,
-                'children': [{
-                    'id': item.id,
-                    'name': item.name,
-                    'type': item.type,
-                    'has_children': item.has_children,
-                    'created_at': item.created_at.isoformat() if item.created_at else None,
-                    'updated_at': item.updated_at.isoformat() if item.updated_at else None,
-                    'content': item.content if item.type == 'FILE' else None
-                } for item in direct_children]
+                'child_folder_count': root_folder.child_folder_count,
+                'article_count': root_folder.article_count,
+                'has_children': root_folder.has_children,
+                'children': [_serialize_child(item, include_content) for item in direct_children]
             }
         else:
             root_data = None
@@ -348,3 +590,47 @@ def get_folder_list():
             'data': None,
             'message': f'获取文件夹列表失败: {str(e)}'
         }), 200
+
+@folder_api.route('/tree', methods=["GET"])
+@jwt_required()
+def get_folder_tree():
+    """获取完整的文件夹树（仅文件夹，不含文章），直接由内存索引返回"""
+    try:
+        index = folder_index.get()
+        return jsonify({
+            'code': 200,
+            'data': index.subtree(index.root_id) if index.root_id else None,
+            'message': '获取成功'
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'code': 500,
+            'data': None,
+            'message': f'获取文件夹树失败: {str(e)}'
+        }), 200
+
+@folder_api.route('/<int:folder_id>/path', methods=["GET"])
+def get_folder_path(folder_id):
+    """获取从根文件夹到指定文件夹的路径（面包屑）"""
+    try:
+        path = folder_index.get().breadcrumbs(folder_id)
+        if not path:
+            return jsonify({
+                'code': 404,
+                'data': None,
+                'message': '文件夹不存在'
+            }), 200
+
+        return jsonify({
+            'code': 200,
+            'data': [{'id': node.id, 'name': node.name} for node in path],
+            'message': '获取成功'
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'code': 500,
+            'data': None,
+            'message': f'获取路径失败: {str(e)}'
+        }), 200
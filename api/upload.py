@@ -1,6 +1,8 @@
-from flask import Blueprint, request, current_app
+from flask import Blueprint, request, current_app, send_from_directory, abort
 import os
+import mimetypes
 from werkzeug.utils import secure_filename
+from werkzeug.security import safe_join
 from datetime import datetime
 import hashlib
 import time
@@ -9,6 +11,9 @@ upload_api = Blueprint('upload', __name__)
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
 
+# 文件名为内容哈希，上传后不会再变，可长期缓存
+UPLOAD_CACHE_MAX_AGE = 365 * 24 * 3600
+
 def get_upload_path():
     """根据环境返回不同的上传路径"""
     env = os.getenv('FLASK_ENV', 'development')
@@ -24,7 +29,7 @@ def get_url_prefix():
     if env == 'production':
         return '/uploads'
     else:
-        return 'http://127.0.0.1:8000/static/uploads'
+        return 'http://127.0.0.1:8000/upload/files'
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -83,4 +88,40 @@ def upload_image():
             'message': '上传成功'
         }
     
-    return {'code': 400, 'message': '不支持的文件类型'}, 400 
\ No newline at end of file
+    return {'code': 400, 'message': '不支持的文件类型'}, 400
+
+@upload_api.route('/files/<path:filename>', methods=['GET'])
+def serve_upload(filename):
+    """读取已上传的图片
+
+    默认由 Flask 直接返回文件（支持 ETag / If-None-Match / Range）。
+    配置 UPLOAD_SENDFILE 后只返回响应头，由前端服务器发送文件内容：
+        x-accel:    Nginx，X-Accel-Redirect 指向 UPLOAD_ACCEL_PREFIX 下的 internal location
+        x-sendfile: Apache / lighttpd，X-Sendfile 为文件的绝对路径
+    """
+    if not allowed_file(filename):
+        abort(404)
+
+    base_upload_path = get_upload_path()
+    file_path = safe_join(base_upload_path, filename)
+    if file_path is None or not os.path.isfile(file_path):
+        abort(404)
+
+    mode = current_app.config.get('UPLOAD_SENDFILE')
+    if mode in ('x-accel', 'x-sendfile'):
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        if mode == 'x-accel':
+            accel_prefix = current_app.config.get('UPLOAD_ACCEL_PREFIX', '/protected-uploads')
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+        else:
+            response.headers['X-Sendfile'] = os.path.abspath(file_path)
+    else:
+        response = send_from_directory(base_upload_path, filename, conditional=True, etag=True,
+                                       max_age=UPLOAD_CACHE_MAX_AGE)
+
+    response.cache_control.public = True
+    response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
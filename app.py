@@ -4,7 +4,10 @@ from api.article import article_api
 from api.user import user_api
 from api.upload import upload_api
 from api.folder import folder_api
+from api.change import change_api
 from models.folder import Folder
+from models.job import Job
+from models.change import Change, FolderTreeVersion
 
 from extensions import db, jwt  # 导入已创建的db实例
 from flask_cors import CORS
@@ -14,6 +17,14 @@ import secrets
 from flask_jwt_extended import JWTManager
 
 from error_handlers import register_error_handlers
+from commands import register_commands
+from rate_limit import register_rate_limiter
+from services.write_buffer import article_write_buffer
+from services.jobs import JobWorker
+from services.changes import record_change
+from models.types import configure_compression
+
+import os
 
 def create_app():
     app = Flask(__name__)
@@ -27,6 +38,15 @@ def create_app():
     
     # 3. 初始化 JWT
     jwt.init_app(app)
+
+    # 3.1 限流与过载保护：按用户 / IP 的令牌桶，状态保存在本地 SQLite 文件中供多个 worker 共享
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    app.config['RATE_LIMIT_STORAGE'] = os.getenv('RATE_LIMIT_STORAGE')
+    # 配合 Nginx 的 proxy_set_header X-Request-Start "t=${msec}"，排队超过该毫秒数的请求直接返回 503
+    app.config['RATE_LIMIT_MAX_QUEUE_MS'] = int(os.getenv('RATE_LIMIT_MAX_QUEUE_MS', '0')) or None
+    # 经 Nginx 等反向代理（proxy_pass）访问时设为代理层数，按 X-Forwarded-For 中的客户端 IP 限流
+    app.config['RATE_LIMIT_TRUST_PROXY'] = int(os.getenv('RATE_LIMIT_TRUST_PROXY', '0'))
+    register_rate_limiter(app)
     
     # 4. 设置 CORS
     CORS(app, resources={r"/api/*": {
@@ -49,16 +69,47 @@ def create_app():
     # 2 若是升级 flask db upgrade
     migrate = Migrate(app, db)
 
+    # 文章写回缓冲：高频自动保存合并后批量落盘，仅适用于单进程部署
+    app.config['ARTICLE_WRITE_BUFFER'] = os.getenv('ARTICLE_WRITE_BUFFER', '0') == '1'
+    app.config['ARTICLE_WRITE_BUFFER_INTERVAL'] = float(os.getenv('ARTICLE_WRITE_BUFFER_INTERVAL', '2'))
+    app.config['ARTICLE_WRITE_BUFFER_MAX_DELAY'] = float(os.getenv('ARTICLE_WRITE_BUFFER_MAX_DELAY', '10'))
+    article_write_buffer.init_app(app)
+
+    # 上传图片交给前端服务器发送：x-accel（Nginx）/ x-sendfile（Apache），为空时由 Flask 发送
+    app.config['UPLOAD_SENDFILE'] = os.getenv('UPLOAD_SENDFILE') or None
+    app.config['UPLOAD_ACCEL_PREFIX'] = os.getenv('UPLOAD_ACCEL_PREFIX', '/protected-uploads')
+
+    # 文章正文压缩：zlib / zstd，超过阈值（字节）的正文压缩存储，为空时不压缩
+    configure_compression(
+        os.getenv('ARTICLE_COMPRESSION') or None,
+        int(os.getenv('ARTICLE_COMPRESSION_MIN_BYTES', '4096'))
+    )
+
+    # 变更推送（SSE）会长期占用 worker 线程，默认关闭
+    app.config['CHANGE_STREAM_ENABLED'] = os.getenv('CHANGE_STREAM_ENABLED', '0') == '1'
+    # seq 空缺（事务未提交）时增量同步最多等待的秒数
+    app.config['CHANGE_GAP_TIMEOUT'] = float(os.getenv('CHANGE_GAP_TIMEOUT', '30'))
+
+    # 命令行工具，如 flask repair-folder-counts、flask jobs-worker
+    register_commands(app)
+
 
     # 6. 创建数据库表
     with app.app_context():
         db.create_all()
 
+        # 文件夹树版本号只有一行，启动时预先创建，避免并发首次写入时主键冲突
+        if not db.session.get(FolderTreeVersion, 1):
+            db.session.add(FolderTreeVersion(id=1, version=0))
+            db.session.commit()
+
         # 确保存在根文件夹
         root_folder = Folder.query.filter_by(name="默认文件夹").first()
         if not root_folder:
             root_folder = Folder(name="默认文件夹", is_root=True)
             db.session.add(root_folder)
+            db.session.flush()
+            record_change('folder', root_folder.id, 'create', None, {'name': root_folder.name})
             db.session.commit()
 
     # 7. 最后才注册蓝图
@@ -66,6 +117,12 @@ def create_app():
     app.register_blueprint(user_api, url_prefix="/user")
     app.register_blueprint(upload_api, url_prefix="/upload")
     app.register_blueprint(folder_api, url_prefix="/folder")
+    app.register_blueprint(change_api, url_prefix="/changes")
+
+    # 8. 进程内后台任务 worker，JOB_WORKERS=0 时需单独运行 flask jobs-worker
+    job_workers = int(os.getenv('JOB_WORKERS', '0'))
+    if job_workers > 0:
+        JobWorker(app, concurrency=job_workers).start()
 
     # 定义根路由
     @app.route('/')
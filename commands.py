@@ -0,0 +1,95 @@
+import click
+
+from extensions import db
+from models.folder import Folder
+from models.article import Article
+from services.jobs import JobWorker
+from services.markdown_meta import derive_fields
+from services.jobs import enqueue
+from services.content_compression import compress_article_batch
+
+
+def register_commands(app):
+    @app.cli.command('repair-folder-counts')
+    def repair_folder_counts():
+        """重新统计所有文件夹的子文件夹数和文章数"""
+        folder_counts = dict(
+            db.session.query(Folder.parent_id, db.func.count(Folder.id))
+            .filter(Folder.parent_id.isnot(None))
+            .group_by(Folder.parent_id)
+            .all()
+        )
+        article_counts = dict(
+            db.session.query(Article.parent_id, db.func.count(Article.id))
+            .filter(Article.parent_id.isnot(None))
+            .group_by(Article.parent_id)
+            .all()
+        )
+
+        fixed = 0
+        for folder in Folder.query.all():
+            child_folder_count = folder_counts.get(folder.id, 0)
+            article_count = article_counts.get(folder.id, 0)
+            if folder.child_folder_count != child_folder_count or folder.article_count != article_count:
+                folder.child_folder_count = child_folder_count
+                folder.article_count = article_count
+                fixed += 1
+        db.session.commit()
+        click.echo(f'已修复 {fixed} 个文件夹的计数')
+
+    @app.cli.command('jobs-worker')
+    @click.option('--concurrency', default=2, help='并发执行的线程数')
+    @click.option('--poll-interval', default=1.0, help='无任务时的轮询间隔（秒）')
+    @click.option('--visibility-timeout', default=300, help='任务领取后的超时时间（秒）')
+    def jobs_worker(concurrency, poll_interval, visibility_timeout):
+        """启动独立的后台任务 worker"""
+        click.echo(f'后台任务 worker 已启动，并发数 {concurrency}')
+        JobWorker(app, concurrency, poll_interval, visibility_timeout).run_forever()
+
+    @app.cli.command('backfill-article-meta')
+    @click.option('--batch-size', default=200, help='每批处理的文章数')
+    @click.option('--all', 'refresh_all', is_flag=True, help='重新计算所有文章，而不只是尚未回填的')
+    def backfill_article_meta(batch_size, refresh_all):
+        """分批为已有文章计算摘要、字数与标题大纲"""
+        last_id = 0
+        total = 0
+        while True:
+            query = db.session.query(Article.id, Article.content).filter(Article.id > last_id)
+            if not refresh_all:
+                query = query.filter(Article.word_count.is_(None))
+            batch = query.order_by(Article.id).limit(batch_size).all()
+            if not batch:
+                break
+            for article_id, content in batch:
+                # 显式保留 updated_at，回填不算作文章更新
+                db.session.execute(
+                    db.update(Article)
+                    .where(Article.id == article_id)
+                    .values(updated_at=Article.updated_at, **derive_fields(content or ''))
+                )
+            db.session.commit()
+            last_id = batch[-1].id
+            total += len(batch)
+            click.echo(f'已处理 {total} 篇文章')
+        click.echo(f'回填完成，共 {total} 篇')
+
+    @app.cli.command('compress-articles')
+    @click.option('--batch-size', default=200, help='每批处理的文章数')
+    @click.option('--background', is_flag=True, help='交给后台任务 worker 分批执行')
+    def compress_articles(batch_size, background):
+        """按当前压缩配置分批改写已有文章的正文存储格式"""
+        if background:
+            enqueue('articles.compress', {'last_id': 0, 'batch_size': batch_size})
+            db.session.commit()
+            click.echo('已加入后台任务队列')
+            return
+
+        last_id = 0
+        total = 0
+        while True:
+            last_id, rewritten = compress_article_batch(last_id, batch_size)
+            if last_id is None:
+                break
+            total += rewritten
+            click.echo(f'已处理到文章 {last_id}，累计改写 {total} 篇')
+        click.echo(f'完成，共改写 {total} 篇')
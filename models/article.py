@@ -1,12 +1,26 @@
 from datetime import datetime
 from extensions import db
+from services.markdown_meta import derive_fields
+from models.types import CompressedText
 
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        # 文件夹子项分页排序，见 api/folder.py 中的 _query_children_page
+        db.Index('ix_articles_parent_title', 'parent_id', 'title', 'id'),
+        db.Index('ix_articles_parent_created', 'parent_id', 'created_at', 'id'),
+        db.Index('ix_articles_parent_updated', 'parent_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.Text)
+    # 大正文按配置压缩存储；延迟加载，只有访问 content 时才读取并解压
+    content = db.deferred(db.Column(CompressedText))
+
+    # 写入时由 content 派生的字段，列表接口无需读取正文；为 NULL 表示尚未回填
+    excerpt = db.Column(db.String(255))
+    word_count = db.Column(db.Integer)
+    outline = db.Column(db.JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -17,3 +31,11 @@ class Article(db.Model):
     # 修改 parent_id 为可空
     parent_id = db.Column(db.Integer, db.ForeignKey('folders.id'), nullable=True)
     parent = db.relationship('Folder', back_populates='articles')
+
+    def set_content(self, content):
+        """设置正文并同步更新摘要、字数与标题大纲"""
+        self.content = content
+        derived = derive_fields(content)
+        self.excerpt = derived['excerpt']
+        self.word_count = derived['word_count']
+        self.outline = derived['outline']
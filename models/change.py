@@ -0,0 +1,30 @@
+from datetime import datetime
+from extensions import db
+
+class Change(db.Model):
+    """文件夹树的追加式变更日志，seq 单调递增，供客户端增量同步"""
+    __tablename__ = 'changes'
+    __table_args__ = (
+        db.Index('ix_changes_entity_type_seq', 'entity_type', 'seq'),
+    )
+
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True, autoincrement=True)
+    entity_type = db.Column(db.String(20), nullable=False)   # folder / article
+    entity_id = db.Column(db.Integer, nullable=False)
+    action = db.Column(db.String(20), nullable=False)        # create / update / move / delete
+    parent_id = db.Column(db.Integer, nullable=True)
+    data = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+
+class FolderTreeVersion(db.Model):
+    """文件夹树的版本号，只有一行
+
+    每个修改文件夹的事务在提交前执行 version = version + 1，行锁使版本号的递增顺序与提交顺序一致，
+    不会出现自增 seq 那样较小的值晚提交的情况。
+    """
+    __tablename__ = 'folder_tree_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
@@ -8,6 +8,12 @@ class NodeType(Enum):
 
 class Folder(db.Model):
     __tablename__ = 'folders'
+    __table_args__ = (
+        # 子项分页排序，见 api/folder.py 中的 _query_children_page
+        db.Index('ix_folders_parent_name', 'parent_id', 'name', 'id'),
+        db.Index('ix_folders_parent_created', 'parent_id', 'created_at', 'id'),
+        db.Index('ix_folders_parent_updated', 'parent_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
@@ -24,16 +30,41 @@ class Folder(db.Model):
     
     # 添加与文章的关联
     articles = db.relationship('Article', back_populates='parent', cascade='all, delete-orphan')
+
+    # 冗余计数，由创建/移动/删除在同一事务内维护，可用 flask repair-folder-counts 修复
+    child_folder_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    article_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     def __init__(self, name, parent=None, is_root=False):
         self.name = name
-        self.parent = parent
+        # 未传 parent 时不触碰关系属性，以便调用方直接设置 parent_id
+        if parent is not None:
+            self.parent = parent
         self.is_root = is_root
     
     def update_name(self, new_name):
         self.name = new_name
         self.updated_at = datetime.utcnow()
     
+    @property
+    def has_children(self):
+        return (self.child_folder_count or 0) + (self.article_count or 0) > 0
+
+    @staticmethod
+    def adjust_counts(folder_id, child_folders=0, articles=0):
+        """在当前事务中原子地增减指定文件夹的子项计数"""
+        if folder_id is None or (not child_folders and not articles):
+            return
+        values = {}
+        if child_folders:
+            values['child_folder_count'] = Folder.child_folder_count + child_folders
+        if articles:
+            values['article_count'] = Folder.article_count + articles
+        db.session.execute(
+            db.update(Folder).where(Folder.id == folder_id).values(**values),
+            execution_options={'synchronize_session': 'fetch'}
+        )
+
     def add_child(self, child):
         """添加子文件夹，并检查是否会形成循环"""
         if self._would_create_cycle(child):
@@ -0,0 +1,76 @@
+import zlib
+
+from extensions import db
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 压缩数据以 NUL 开头的标记区分，正常的 Markdown 文本不会以 NUL 开头，
+# 因此未压缩的旧数据（纯 UTF-8）无需迁移即可正常读取
+ZLIB_MARKER = b'\x00z'
+ZSTD_MARKER = b'\x00s'
+
+# 由 configure_compression 在应用启动时设置
+_settings = {
+    'algorithm': None,      # None / 'zlib' / 'zstd'
+    'min_bytes': 4096,
+}
+
+
+def configure_compression(algorithm=None, min_bytes=4096):
+    if algorithm == 'zstd' and zstandard is None:
+        # 未安装 zstandard 时退回 zlib，已写入的 zstd 数据仍需安装后才能读取
+        algorithm = 'zlib'
+    _settings['algorithm'] = algorithm
+    _settings['min_bytes'] = min_bytes
+
+
+def compress_text(value, algorithm=None, min_bytes=None):
+    """把文本编码为存储格式，不足 min_bytes 或未开启压缩时保存为纯 UTF-8"""
+    if value is None:
+        return None
+    algorithm = _settings['algorithm'] if algorithm is None else algorithm
+    min_bytes = _settings['min_bytes'] if min_bytes is None else min_bytes
+    raw = value.encode('utf-8')
+    if not algorithm or len(raw) < min_bytes:
+        return raw
+    if algorithm == 'zstd':
+        compressed = ZSTD_MARKER + zstandard.ZstdCompressor(level=6).compress(raw)
+    else:
+        compressed = ZLIB_MARKER + zlib.compress(raw, 6)
+    # 压缩后反而更大（如已压缩的内容）时保存原文
+    return compressed if len(compressed) < len(raw) else raw
+
+
+def decompress_text(value):
+    # 列尚未迁移为 LONGBLOB（仍为 TEXT）或 SQLite 中的旧数据，驱动直接返回 str
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value.startswith(ZLIB_MARKER):
+        return zlib.decompress(value[len(ZLIB_MARKER):]).decode('utf-8')
+    if value.startswith(ZSTD_MARKER):
+        if zstandard is None:
+            raise RuntimeError('读取 zstd 压缩的内容需要安装 zstandard')
+        return zstandard.ZstdDecompressor().decompress(value[len(ZSTD_MARKER):]).decode('utf-8')
+    return value.decode('utf-8')
+
+
+def is_compressed(value):
+    return value is not None and not isinstance(value, str) and bytes(value[:2]) in (ZLIB_MARKER, ZSTD_MARKER)
+
+
+class CompressedText(db.TypeDecorator):
+    """对外表现为字符串，超过阈值时以 zlib / zstd 压缩后存为二进制"""
+
+    # MySQL 上为 LONGBLOB
+    impl = db.LargeBinary(length=2 ** 32 - 1)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -0,0 +1,203 @@
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import request, jsonify, g
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+from extensions import db
+
+# 每类接口的令牌桶参数：(每秒补充的令牌数, 桶容量)
+DEFAULT_RATE_LIMITS = {
+    'read': (20, 60),
+    'write': (5, 30),
+    'upload': (0.5, 5),
+}
+
+# 每个进程内每类接口最多同时处理的请求数，保证慢请求不会占满全部 worker 线程
+DEFAULT_CONCURRENCY_LIMITS = {
+    'upload': 1,
+    'bulk_read': 1,
+}
+# 超出并发上限时先等待的秒数，前一个请求在此期间结束即可继续处理，仍未轮到才返回 503
+DEFAULT_CONCURRENCY_WAIT = 1.0
+
+# 不做限制的接口：图片访问由前端服务器处理，SSE 为长连接
+EXEMPT_ENDPOINTS = {'hello', 'upload.serve_upload', 'change.stream_changes', 'static'}
+# 可能一次读取大量数据的接口；打开文件夹等日常浏览接口不计入
+BULK_READ_ENDPOINTS = {'folder.get_folder_tree', 'article.get_articles', 'article.get_articles_batch'}
+
+
+class MemoryBucketStore:
+    """进程内令牌桶，仅适用于单进程部署"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate, burst):
+        """消耗一个令牌，返回 (是否允许, 需要等待的秒数)"""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+class SqliteBucketStore:
+    """基于本地 SQLite 文件的令牌桶，同一台机器上的多个 worker 进程共享状态"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # 限流状态丢失无碍，不需要每次落盘
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, rate, burst):
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            conn.execute('INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                         (key, tokens, now))
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 3600,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, 0 if allowed else (1 - tokens) / rate
+
+
+def _endpoint_class():
+    if request.endpoint == 'upload.upload_image':
+        return 'upload'
+    if request.method in ('GET', 'HEAD'):
+        return 'read'
+    return 'write'
+
+
+def _client_key(app):
+    """已登录用户按用户 ID 限流，否则按客户端 IP"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+        if identity is not None:
+            return f'user:{identity}'
+    except Exception:
+        # Token 无效时交给接口自身的 jwt_required 处理，这里按 IP 限流
+        pass
+    # 位于 N 层反向代理之后时，取倒数第 N 个 X-Forwarded-For 地址；更靠前的地址可由客户端伪造
+    proxies = app.config.get('RATE_LIMIT_TRUST_PROXY') or 0
+    if proxies and request.headers.get('X-Forwarded-For') and len(request.access_route) >= proxies:
+        return f'ip:{request.access_route[-proxies]}'
+    return f'ip:{request.remote_addr}'
+
+
+def _queue_wait_ms():
+    """根据前端服务器设置的 X-Request-Start（如 Nginx 的 t=${msec}）计算排队时间"""
+    header = request.headers.get('X-Request-Start', '')
+    try:
+        started = float(header.replace('t=', ''))
+    except ValueError:
+        return None
+    # 兼容秒、毫秒、微秒三种精度
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return (time.time() - started) * 1000
+
+
+def _db_pool_saturated():
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout') or not hasattr(pool, '_max_overflow'):
+        return False
+    return pool.checkedout() >= pool.size() + max(pool._max_overflow, 0)
+
+
+def _reject(status, message, retry_after):
+    response = jsonify({'code': status, 'data': None, 'message': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def register_rate_limiter(app):
+    if not app.config.get('RATE_LIMIT_ENABLED', True):
+        return
+
+    rate_limits = {**DEFAULT_RATE_LIMITS, **app.config.get('RATE_LIMITS', {})}
+    concurrency_limits = {**DEFAULT_CONCURRENCY_LIMITS, **app.config.get('CONCURRENCY_LIMITS', {})}
+    semaphores = {name: threading.BoundedSemaphore(limit) for name, limit in concurrency_limits.items()}
+    max_queue_ms = app.config.get('RATE_LIMIT_MAX_QUEUE_MS')
+    concurrency_wait = app.config.get('CONCURRENCY_WAIT', DEFAULT_CONCURRENCY_WAIT)
+
+    storage = app.config.get('RATE_LIMIT_STORAGE') or os.path.join(tempfile.gettempdir(), 'flask-blog-ratelimit.db')
+    store = MemoryBucketStore() if storage == 'memory' else SqliteBucketStore(storage)
+
+    @app.before_request
+    def admit_request():
+        if request.method == 'OPTIONS' or request.endpoint in EXEMPT_ENDPOINTS or request.endpoint is None:
+            return None
+
+        # 1. 在前端服务器中排队过久的请求，客户端多半已超时，直接丢弃
+        if max_queue_ms:
+            waited = _queue_wait_ms()
+            if waited is not None and waited > max_queue_ms:
+                return _reject(503, '服务繁忙，请稍后再试', 1)
+
+        # 2. 按用户 / IP 的令牌桶限流
+        endpoint_class = _endpoint_class()
+        rate, burst = rate_limits[endpoint_class]
+        try:
+            allowed, retry_after = store.consume(f'{endpoint_class}:{_client_key(app)}', rate, burst)
+        except Exception as e:
+            # 限流存储异常时放行，不影响正常业务
+            app.logger.warning(f'限流检查失败: {str(e)}')
+            allowed, retry_after = True, 0
+        if not allowed:
+            return _reject(429, '请求过于频繁，请稍后再试', retry_after)
+
+        # 3. 慢接口的并发上限，以及数据库连接池耗尽时提前拒绝
+        concurrency_class = 'bulk_read' if request.endpoint in BULK_READ_ENDPOINTS else endpoint_class
+        semaphore = semaphores.get(concurrency_class)
+        if semaphore is not None:
+            if not semaphore.acquire(timeout=concurrency_wait):
+                return _reject(503, '服务繁忙，请稍后再试', 1)
+            g.admission_semaphore = semaphore
+
+        if _db_pool_saturated():
+            return _reject(503, '服务繁忙，请稍后再试', 1)
+        return None
+
+    @app.teardown_request
+    def release_request(exc):
+        semaphore = g.pop('admission_semaphore', None)
+        if semaphore is not None:
+            semaphore.release()
@@ -0,0 +1,99 @@
+"""对比纯 TEXT 与压缩存储的表大小和读取延迟
+
+用法:
+    python scripts/bench_compression.py [--rows 2000] [--size 20000] [--algorithm zlib] [--db sqlite:///bench.db]
+
+默认使用临时 SQLite 文件，表大小取自 dbstat；--db 指向 MySQL 时取自 information_schema.TABLES
+（需先 ANALYZE TABLE，结果为 InnoDB 估算值）。
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy as sa
+
+from models.types import CompressedText, configure_compression
+
+PARAGRAPHS = [
+    '## 小节标题\n',
+    '这是一段用于测试的中文正文，包含常见的标点符号、数字 12345 以及少量 English words。\n\n',
+    '- 列表项一\n- 列表项二\n- 列表项三\n\n',
+    '```python\nfor i in range(10):\n    print(i)\n```\n\n',
+    '> 引用一段文字，说明压缩对重复度较高的 Markdown 文本效果明显。\n\n',
+    '![图片](/uploads/202501/00d7298500a2ae58eb368fd19c62ccba.jpg)\n\n',
+]
+
+
+def make_document(size):
+    parts = []
+    length = 0
+    while length < size:
+        part = random.choice(PARAGRAPHS)
+        parts.append(part)
+        length += len(part.encode('utf-8'))
+    return ''.join(parts)
+
+
+def table_size(engine, name):
+    with engine.connect() as conn:
+        if engine.dialect.name == 'sqlite':
+            return conn.execute(sa.text('SELECT SUM(pgsize) FROM dbstat WHERE name = :name'), {'name': name}).scalar()
+        conn.execute(sa.text(f'ANALYZE TABLE {name}'))
+        return conn.execute(sa.text(
+            'SELECT data_length + index_length FROM information_schema.TABLES '
+            'WHERE table_schema = DATABASE() AND table_name = :name'
+        ), {'name': name}).scalar()
+
+
+def bench_reads(engine, table, ids, reads):
+    start = time.perf_counter()
+    with engine.connect() as conn:
+        for _ in range(reads):
+            conn.execute(sa.select(table.c.content).where(table.c.id == random.choice(ids))).scalar()
+    return (time.perf_counter() - start) / reads * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--size', type=int, default=20000, help='每篇文章的大致字节数')
+    parser.add_argument('--algorithm', default='zlib', choices=['zlib', 'zstd'])
+    parser.add_argument('--min-bytes', type=int, default=4096)
+    parser.add_argument('--reads', type=int, default=2000)
+    parser.add_argument('--db', default=None)
+    args = parser.parse_args()
+
+    configure_compression(args.algorithm, args.min_bytes)
+    engine = sa.create_engine(args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    metadata = sa.MetaData()
+    tables = {
+        'TEXT': sa.Table('bench_plain', metadata,
+                         sa.Column('id', sa.Integer, primary_key=True), sa.Column('content', sa.Text)),
+        args.algorithm: sa.Table('bench_compressed', metadata,
+                                 sa.Column('id', sa.Integer, primary_key=True), sa.Column('content', CompressedText)),
+    }
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+
+    random.seed(0)
+    documents = [{'id': i + 1, 'content': make_document(args.size)} for i in range(args.rows)]
+    ids = [doc['id'] for doc in documents]
+    for table in tables.values():
+        with engine.begin() as conn:
+            conn.execute(table.insert(), documents)
+
+    for label, table in tables.items():
+        size = table_size(engine, table.name)
+        latency = bench_reads(engine, table, ids, args.reads)
+        print(f'{label:>5}: 表大小 {size / 1024 / 1024:.2f} MB, 单行读取 {latency:.3f} ms')
+
+    metadata.drop_all(engine)
+
+
+if __name__ == '__main__':
+    main()
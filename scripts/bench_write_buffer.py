@@ -0,0 +1,85 @@
+"""对比逐次提交与写回缓冲两种保存方式的耗时
+
+用法:
+    python scripts/bench_write_buffer.py [--saves 2000] [--articles 5] [--db sqlite:///bench.db]
+
+默认使用临时 SQLite 文件，可通过 --db 指向 MySQL 以获得更接近生产的结果。
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask_jwt_extended import create_access_token
+
+from extensions import db, jwt
+from api.article import article_api
+from models.article import Article
+from models.folder import Folder
+from models.user import User
+from services.write_buffer import article_write_buffer
+
+
+def build_app(db_uri, buffered):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = 'bench-write-buffer-secret-key-0123456789'
+    app.config['ARTICLE_WRITE_BUFFER'] = buffered
+    db.init_app(app)
+    jwt.init_app(app)
+    article_write_buffer.init_app(app)
+    app.register_blueprint(article_api, url_prefix='/article')
+    return app
+
+
+def run(db_uri, saves, article_count, buffered):
+    app = build_app(db_uri, buffered)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password='x')
+        folder = Folder(name='bench', is_root=True)
+        db.session.add_all([user, folder])
+        db.session.commit()
+        articles = [Article(title=f'a{i}', content='', user_id=user.id, parent_id=folder.id)
+                    for i in range(article_count)]
+        db.session.add_all(articles)
+        db.session.commit()
+        article_ids = [article.id for article in articles]
+        token = create_access_token(identity=str(user.id))
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    start = time.perf_counter()
+    for i in range(saves):
+        article_id = article_ids[i % article_count]
+        client.put(f'/article/{article_id}', json={'content': f'draft {i} ' * 50}, headers=headers)
+    if buffered:
+        article_write_buffer.flush()
+    elapsed = time.perf_counter() - start
+    if buffered:
+        article_write_buffer.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--saves', type=int, default=2000)
+    parser.add_argument('--articles', type=int, default=5)
+    parser.add_argument('--db', default=None)
+    args = parser.parse_args()
+
+    db_uri = args.db or 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench.db')
+    for label, buffered in (('逐次提交', False), ('写回缓冲', True)):
+        elapsed = run(db_uri, args.saves, args.articles, buffered)
+        print(f'{label}: {args.saves} 次保存 {elapsed:.3f}s, '
+              f'{args.saves / elapsed:.0f} 次/秒, 平均 {elapsed / args.saves * 1000:.2f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.change import Change
+
+
+class ArticleCache:
+    """进程内的文章 LRU 缓存，缓存序列化后的 dict
+
+    失效方式与文件夹树索引相同，以 changes 表为准：
+        - 本进程提交文章变更后立即淘汰对应条目；
+        - 最多每 check_interval 秒读取一次其他进程写入的文章变更及文件夹删除并淘汰；
+        - 条目最长保留 ttl 秒，兜底自增 seq 提交顺序不一致等漏掉的变更。
+    """
+
+    def __init__(self, max_entries=1000, check_interval=1.0, ttl=60):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_seq = None
+        self._checked_at = 0.0
+        # 每次淘汰都递增，读库期间发生过淘汰的结果不写入缓存，避免写回旧数据
+        self.generation = 0
+
+    def get_many(self, article_ids, fields):
+        """返回 {id: dict}，只包含已缓存且含有全部 fields 的条目"""
+        self._sync()
+        found = {}
+        expired_before = time.monotonic() - self.ttl
+        with self._lock:
+            for article_id in article_ids:
+                cached = self._entries.get(article_id)
+                if cached is None:
+                    continue
+                entry, loaded_at = cached
+                if loaded_at < expired_before:
+                    del self._entries[article_id]
+                elif fields <= entry.keys():
+                    self._entries.move_to_end(article_id)
+                    found[article_id] = entry
+        return found
+
+    def put_many(self, entries, generation):
+        with self._lock:
+            if generation != self.generation:
+                return
+            now = time.monotonic()
+            for entry in entries:
+                self._entries[entry['id']] = (entry, now)
+                self._entries.move_to_end(entry['id'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, article_ids):
+        with self._lock:
+            self.generation += 1
+            for article_id in article_ids:
+                self._entries.pop(article_id, None)
+
+    def evict_folders(self, folder_ids):
+        """淘汰位于指定文件夹中的文章，用于文件夹删除时批量删除的文章"""
+        folder_ids = set(folder_ids)
+        with self._lock:
+            self.generation += 1
+            for article_id, (entry, _) in list(self._entries.items()):
+                if entry.get('parent_id') in folder_ids:
+                    del self._entries[article_id]
+
+    def _sync(self):
+        """淘汰其他进程修改过的文章"""
+        if time.monotonic() - self._checked_at < self.check_interval:
+            return
+        self._checked_at = time.monotonic()
+
+        if self._last_seq is None:
+            self._last_seq = db.session.query(db.func.max(Change.seq)).scalar() or 0
+            return
+        # 删除文件夹时其中的文章被批量删除，不逐篇写变更记录，按文件夹的 delete 淘汰
+        rows = (db.session.query(Change.seq, Change.entity_type, Change.entity_id)
+                .filter(Change.seq > self._last_seq)
+                .filter(db.or_(Change.entity_type == 'article', Change.action == 'delete'))
+                .order_by(Change.seq)
+                .all())
+        if rows:
+            self.evict([entity_id for _, entity_type, entity_id in rows if entity_type == 'article'])
+            deleted_folders = [entity_id for _, entity_type, entity_id in rows if entity_type == 'folder']
+            if deleted_folders:
+                self.evict_folders(deleted_folders)
+            self._last_seq = rows[-1][0]
+
+
+article_cache = ArticleCache()
+
+
+def mark_articles_changed(article_ids):
+    """登记当前事务中修改或删除的文章，提交后从本进程缓存中淘汰"""
+    db.session.info.setdefault('changed_articles', set()).update(article_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _evict_after_commit(session):
+    # record_change 记录的文章 ID，提交后立即从本进程缓存中淘汰
+    changed = session.info.pop('changed_articles', None)
+    if changed:
+        article_cache.evict(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_after_rollback(session):
+    session.info.pop('changed_articles', None)
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.change import Change, FolderTreeVersion
+from services.article_cache import mark_articles_changed
+
+# seq 出现空缺时最多等待的秒数，超过后视为回滚产生的空缺
+CHANGE_GAP_TIMEOUT = 30
+
+
+def record_change(entity_type, entity_id, action, parent_id=None, data=None):
+    """在当前事务中追加一条变更记录，随业务数据一起提交或回滚"""
+    change = Change(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        action=action,
+        parent_id=parent_id,
+        data=data
+    )
+    db.session.add(change)
+    if entity_type == 'folder':
+        # 提交前递增文件夹树版本号，提交后使本进程的文件夹树索引失效，见 services/folder_index.py
+        db.session.info['folder_tree_changed'] = True
+    else:
+        mark_articles_changed([entity_id])
+    return change
+
+
+def changes_since(since, limit=500, gap_timeout=CHANGE_GAP_TIMEOUT):
+    """返回 seq 大于 since 的变更，按 seq 升序，只返回到第一个空缺之前
+
+    自增 seq 在 INSERT 时分配，较小的 seq 可能晚于较大的 seq 提交。遇到 seq 不连续时
+    先不越过空缺，等对应事务提交后再返回，避免客户端把 since 推过尚未提交的变更；
+    空缺之后的记录已写入超过 gap_timeout 秒时，认为空缺来自已回滚的事务，不再等待。
+    """
+    changes = (Change.query
+               .filter(Change.seq > since)
+               .order_by(Change.seq)
+               .limit(limit)
+               .all())
+
+    settled_before = datetime.utcnow() - timedelta(seconds=gap_timeout)
+    expected = since + 1
+    for i, change in enumerate(changes):
+        if change.seq != expected and change.created_at and change.created_at > settled_before:
+            return changes[:i]
+        expected = change.seq + 1
+    return changes
+
+
+def bump_version(session):
+    """在当前事务中递增文件夹树版本号，版本行不存在时创建"""
+    result = session.execute(
+        db.update(FolderTreeVersion)
+        .where(FolderTreeVersion.id == 1)
+        .values(version=FolderTreeVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        session.add(FolderTreeVersion(id=1, version=1))
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_version_before_commit(session):
+    # 在提交前最后一刻加行锁并递增，锁持有时间最短，也不会与其他行锁交叉形成死锁
+    if session.info.get('folder_tree_changed'):
+        bump_version(session)
@@ -0,0 +1,45 @@
+from extensions import db
+from models.article import Article
+from models.types import compress_text, decompress_text
+from services.jobs import enqueue, job_handler
+
+
+def compress_article_batch(last_id=0, batch_size=200):
+    """按 id 顺序处理一批文章，把存储格式与当前压缩配置不一致的正文重新编码
+
+    返回 (本批最后一个 id, 本批改写的行数)，没有更多文章时 id 为 None。
+    """
+    rows = (db.session.query(Article.id, db.type_coerce(Article.content, db.LargeBinary))
+            .filter(Article.id > last_id)
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all())
+    if not rows:
+        return None, 0
+
+    rewritten = 0
+    for article_id, raw in rows:
+        if raw is None:
+            continue
+        text = decompress_text(raw)
+        stored = raw.encode('utf-8') if isinstance(raw, str) else bytes(raw)
+        if compress_text(text) == stored:
+            continue
+        # 显式保留 updated_at，存储格式变化不算作文章更新
+        db.session.execute(
+            db.update(Article)
+            .where(Article.id == article_id)
+            .values(content=text, updated_at=Article.updated_at)
+        )
+        rewritten += 1
+    db.session.commit()
+    return rows[-1][0], rewritten
+
+
+@job_handler('articles.compress')
+def compress_articles_job(payload):
+    """后台任务：每次处理一批，完成后为下一批重新入队，避免长事务"""
+    batch_size = payload.get('batch_size', 200)
+    last_id, _ = compress_article_batch(payload.get('last_id', 0), batch_size)
+    if last_id is not None:
+        enqueue('articles.compress', {'last_id': last_id, 'batch_size': batch_size})
@@ -0,0 +1,143 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models.folder import Folder
+from models.change import FolderTreeVersion
+
+
+class FolderNode:
+    __slots__ = ('id', 'parent_id', 'name', 'is_root', 'children')
+
+    def __init__(self, id, parent_id, name, is_root):
+        self.id = id
+        self.parent_id = parent_id
+        self.name = name
+        self.is_root = is_root
+        self.children = []
+
+
+class FolderIndex:
+    """某一版本的文件夹树快照，只读，不同线程可共享
+
+    只收录从根文件夹可达的节点：删除文件夹后脱离父级、等待后台清理的子树
+    （parent_id 为空且不是根文件夹）视为不存在。
+    """
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.nodes = {}
+        self.root_id = None
+        all_nodes = {}
+        for folder_id, parent_id, name, is_root in rows:
+            all_nodes[folder_id] = FolderNode(folder_id, parent_id, name, is_root)
+            if is_root and self.root_id is None:
+                self.root_id = folder_id
+        for node in all_nodes.values():
+            parent = all_nodes.get(node.parent_id)
+            if parent is not None:
+                parent.children.append(node.id)
+
+        pending = [node for node in all_nodes.values() if node.is_root]
+        while pending:
+            node = pending.pop()
+            if node.id in self.nodes:
+                continue
+            self.nodes[node.id] = node
+            pending.extend(all_nodes[child_id] for child_id in node.children)
+
+    def get(self, folder_id):
+        return self.nodes.get(folder_id)
+
+    def root(self):
+        return self.nodes.get(self.root_id)
+
+    def breadcrumbs(self, folder_id):
+        """从根到指定文件夹的路径，文件夹不存在时返回空列表"""
+        path = []
+        node = self.nodes.get(folder_id)
+        while node is not None and len(path) <= len(self.nodes):
+            path.append(node)
+            node = self.nodes.get(node.parent_id)
+        path.reverse()
+        return path
+
+    def would_create_cycle(self, folder_id, new_parent_id):
+        """把 folder_id 移到 new_parent_id 下是否会形成循环"""
+        return any(node.id == folder_id for node in self.breadcrumbs(new_parent_id))
+
+    def subtree(self, folder_id):
+        """以嵌套 dict 返回文件夹子树（仅文件夹）"""
+        node = self.nodes.get(folder_id)
+        if node is None:
+            return None
+        result = {'id': node.id, 'name': node.name, 'children': []}
+        stack = [(node, result)]
+        while stack:
+            current, data = stack.pop()
+            for child_id in current.children:
+                child = self.nodes[child_id]
+                child_data = {'id': child.id, 'name': child.name, 'children': []}
+                data['children'].append(child_data)
+                stack.append((child, child_data))
+        return result
+
+
+class FolderIndexCache:
+    """进程内共享的文件夹树索引
+
+    版本号取 folder_tree_version 表，所有 worker 进程共用同一来源：
+    本进程的文件夹变更会立即标记失效，其他进程的变更最迟 check_interval 秒后可见。
+    """
+
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._index = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        index = self._index
+        if index is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return index
+
+        with self._lock:
+            index = self._index
+            if index is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return index
+            version = self._current_version()
+            if index is None or index.version != version:
+                rows = db.session.query(Folder.id, Folder.parent_id, Folder.name, Folder.is_root).all()
+                index = FolderIndex(version, rows)
+                self._index = index
+            self._checked_at = time.monotonic()
+            return index
+
+    def mark_stale(self):
+        """下次访问时重新检查版本号"""
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._index = None
+
+    @staticmethod
+    def _current_version():
+        return db.session.query(FolderTreeVersion.version).filter(FolderTreeVersion.id == 1).scalar() or 0
+
+
+folder_index = FolderIndexCache()
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_stale_after_commit(session):
+    # record_change 写入文件夹变更时设置该标记，提交后本进程立即重新检查版本
+    if session.info.pop('folder_tree_changed', False):
+        folder_index.mark_stale()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_flag_after_rollback(session):
+    session.info.pop('folder_tree_changed', None)
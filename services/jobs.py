@@ -0,0 +1,143 @@
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from extensions import db
+from models.job import Job
+
+# 任务名 -> 处理函数
+_handlers = {}
+
+
+def job_handler(name):
+    """注册后台任务处理函数
+
+    处理函数在独立的应用上下文中执行，参数为入队时的 payload（dict）。
+    抛出异常即视为失败，按指数退避重试，超过 max_attempts 后标记为 failed。
+    """
+    def decorator(func):
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, delay=0, max_attempts=5):
+    """在当前事务中加入一个后台任务
+
+    任务与业务数据一起提交，提交成功后 worker 才能看到，回滚则任务一并撤销。
+    """
+    job = Job(
+        name=name,
+        payload=payload or {},
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(job)
+    return job
+
+
+class JobWorker:
+    """基于数据库表的任务 worker，不依赖 Redis
+
+    concurrency 个线程各自轮询 jobs 表，通过条件 UPDATE 抢占任务，
+    同一任务只会被一个线程领取；领取后超过 visibility_timeout 秒仍未完成的任务
+    会被重新领取。
+    """
+
+    def __init__(self, app, concurrency=1, poll_interval=1.0, visibility_timeout=300):
+        self.app = app
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._run, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        self.start()
+        try:
+            while not self._stopped.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stop()
+
+    def run_once(self):
+        """领取并执行一个任务，没有可执行任务时返回 False"""
+        with self.app.app_context():
+            job = self._claim()
+            if job is None:
+                return False
+            self._execute(job)
+            return True
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                if self.run_once():
+                    continue
+            except Exception as e:
+                self.app.logger.error(f'任务轮询失败: {str(e)}')
+            self._stopped.wait(self.poll_interval)
+
+    def _claim(self):
+        now = datetime.utcnow()
+        claimable = db.or_(
+            db.and_(Job.status == Job.PENDING, Job.run_at <= now),
+            db.and_(Job.status == Job.RUNNING, Job.locked_until < now)
+        )
+        candidate_ids = db.session.execute(
+            db.select(Job.id).where(claimable).order_by(Job.run_at).limit(self.concurrency)
+        ).scalars().all()
+
+        for job_id in candidate_ids:
+            result = db.session.execute(
+                db.update(Job)
+                .where(Job.id == job_id, claimable)
+                .values(
+                    status=Job.RUNNING,
+                    attempts=Job.attempts + 1,
+                    locked_by=self.worker_id,
+                    locked_until=now + timedelta(seconds=self.visibility_timeout)
+                ),
+                execution_options={'synchronize_session': False}
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return db.session.get(Job, job_id)
+        return None
+
+    def _execute(self, job):
+        handler = _handlers.get(job.name)
+        try:
+            if job.attempts > job.max_attempts:
+                raise RuntimeError('超过最大重试次数')
+            if handler is None:
+                raise RuntimeError(f'未注册的任务: {job.name}')
+            handler(job.payload or {})
+            db.session.commit()
+            job.status = Job.DONE
+            job.last_error = None
+        except Exception as e:
+            db.session.rollback()
+            job.last_error = str(e)
+            if job.attempts >= job.max_attempts or handler is None:
+                job.status = Job.FAILED
+            else:
+                job.status = Job.PENDING
+                job.run_at = datetime.utcnow() + timedelta(seconds=2 ** job.attempts)
+            self.app.logger.warning(f'任务 {job.id}({job.name}) 第 {job.attempts} 次执行失败: {str(e)}')
+        job.locked_by = None
+        job.locked_until = None
+        db.session.commit()
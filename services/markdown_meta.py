@@ -0,0 +1,93 @@
+import re
+
+EXCERPT_WIDTH = 200
+
+_FENCE_RE = re.compile(r'^\s*(```|~~~)')
+_HEADING_RE = re.compile(r'^\s{0,3}(#{1,6})\s+(.*?)\s*#*\s*$')
+_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+_LINK_RE = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_INLINE_CODE_RE = re.compile(r'`([^`]*)`')
+_EMPHASIS_RE = re.compile(r'(\*\*|\*|~~)(?=\S)(.+?)(?<=\S)\1')
+_UNDERSCORE_EMPHASIS_RE = re.compile(r'(?<!\w)(__|_)(?=\S)(.+?)(?<=\S)\1(?!\w)')
+_LINE_PREFIX_RE = re.compile(r'^\s{0,3}(#{1,6}\s+|>\s?|[-*+]\s+|\d+[.)]\s+)')
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]')
+_LATIN_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:['’-][A-Za-z0-9]+)*")
+
+
+def _iter_lines(content):
+    """逐行返回 (是否位于代码块内, 行内容)"""
+    in_fence = False
+    for line in content.splitlines():
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        yield in_fence, line
+
+
+def plain_text(content):
+    """去掉 Markdown 标记，返回纯文本（不含代码块）"""
+    lines = []
+    for in_fence, line in _iter_lines(content or ''):
+        if in_fence:
+            continue
+        heading = _HEADING_RE.match(line)
+        line = heading.group(2) if heading else _LINE_PREFIX_RE.sub('', line)
+        line = _IMAGE_RE.sub(r'\1', line)
+        line = _LINK_RE.sub(r'\1', line)
+        line = _HTML_TAG_RE.sub('', line)
+        line = _INLINE_CODE_RE.sub(r'\1', line)
+        line = _EMPHASIS_RE.sub(r'\2', line)
+        line = _UNDERSCORE_EMPHASIS_RE.sub(r'\2', line)
+        if line.strip():
+            lines.append(line.strip())
+    return ' '.join(lines)
+
+
+def _char_width(char):
+    return 2 if _CJK_RE.match(char) else 1
+
+
+def make_excerpt(content, width=EXCERPT_WIDTH):
+    """生成摘要，按显示宽度截断：中日韩字符计 2，其余计 1
+
+    截断点落在英文单词中间时回退到前一个空格，避免半个单词。
+    """
+    text = plain_text(content)
+    used = 0
+    for i, char in enumerate(text):
+        used += _char_width(char)
+        if used > width:
+            cut = text[:i]
+            if char.isalnum() and cut and cut[-1].isalnum() and not _CJK_RE.match(char):
+                space = cut.rfind(' ')
+                if space > len(cut) - 20:
+                    cut = cut[:space]
+            return cut.rstrip() + '…'
+    return text
+
+
+def count_words(content):
+    """字数统计：每个中日韩字符计 1，英文与数字按单词计"""
+    text = plain_text(content)
+    return len(_CJK_RE.findall(text)) + len(_LATIN_WORD_RE.findall(_CJK_RE.sub(' ', text)))
+
+
+def parse_outline(content):
+    """提取 ATX 标题（# 标题），忽略代码块中的内容"""
+    outline = []
+    for in_fence, line in _iter_lines(content or ''):
+        if in_fence:
+            continue
+        match = _HEADING_RE.match(line)
+        if match:
+            outline.append({'level': len(match.group(1)), 'text': plain_text(match.group(2))})
+    return outline
+
+
+def derive_fields(content):
+    return {
+        'excerpt': make_excerpt(content),
+        'word_count': count_words(content),
+        'outline': parse_outline(content)
+    }
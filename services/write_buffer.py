@@ -0,0 +1,175 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from extensions import db
+from services.markdown_meta import derive_fields
+
+DERIVED_FIELDS = ('excerpt', 'word_count', 'outline')
+
+
+class ArticleWriteBuffer:
+    """文章写回缓冲（write-behind）
+
+    同一篇文章在短时间内的多次保存先在内存中合并，由定时线程批量写入数据库，
+    读取时优先返回缓冲中的版本。条目在提交成功后才移出缓冲，写入期间的读取与
+    保存仍以缓冲中的版本为准。
+
+    崩溃安全说明：
+        - 正常退出（atexit / uWSGI 优雅重载）时会把缓冲全部刷入数据库；
+        - 进程被强杀（kill -9、OOM、断电）时，最多丢失最近一个 flush_interval
+          以及单篇最长 max_delay 秒内尚未落盘的修改；
+        - 缓冲仅存在于当前进程，多进程部署（processes > 1）时其他进程读不到
+          未落盘的版本，此时应关闭该功能。
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.flush_interval = 2.0
+        self.max_delay = 10.0
+        self.max_pending = 500
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('ARTICLE_WRITE_BUFFER', False)
+        self.flush_interval = app.config.get('ARTICLE_WRITE_BUFFER_INTERVAL', self.flush_interval)
+        self.max_delay = app.config.get('ARTICLE_WRITE_BUFFER_MAX_DELAY', self.max_delay)
+        self.max_pending = app.config.get('ARTICLE_WRITE_BUFFER_MAX_PENDING', self.max_pending)
+        if self.enabled and self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='article-write-buffer', daemon=True)
+            self._thread.start()
+            atexit.register(self.shutdown)
+
+    def put(self, article_id, changes, base):
+        """合并一次保存，返回该文章缓冲中的最新版本
+
+        changes 为本次提交的字段，base 为数据库中的当前值，仅在首次缓冲时使用。
+        """
+        # 摘要等派生字段在锁外计算，读取缓冲版本时与正文保持一致
+        derived = derive_fields(changes['content']) if 'content' in changes else None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(article_id)
+            if entry is None:
+                entry = {'first_buffered': now, 'title': base['title'], 'content': base['content'], 'version': 0}
+                self._pending[article_id] = entry
+            # 正在写入的条目仍留在缓冲中，本次修改直接合并到它上面，version 递增表示写入期间有变化
+            entry.update(changes)
+            if derived is not None:
+                entry.update(derived)
+            entry['version'] += 1
+            entry['last_buffered'] = now
+            entry['updated_at'] = datetime.utcnow()
+            overflow = len(self._pending) >= self.max_pending
+        if overflow:
+            self._wakeup.set()
+        return entry
+
+    def get(self, article_id):
+        with self._lock:
+            entry = self._pending.get(article_id)
+            return dict(entry) if entry else None
+
+    def discard(self, article_id):
+        """文章被删除时丢弃其缓冲"""
+        with self._lock:
+            self._pending.pop(article_id, None)
+
+    def overlay(self, article_id, data, title_key='title', include_content=True):
+        """用缓冲中的版本覆盖序列化后的文章数据，只覆盖 data 中已有的字段
+
+        title_key 为标题在 data 中的键名（文件夹子项中为 name）；
+        include_content 为 False 时保留 data 中的 content（列表未读取正文）。
+        """
+        if not self.enabled:
+            return data
+        entry = self.get(article_id)
+        if entry:
+            data[title_key] = entry['title']
+            if include_content and 'content' in data:
+                data['content'] = entry['content']
+            for key in DERIVED_FIELDS:
+                if key in entry and key in data:
+                    data[key] = entry[key]
+            if 'updated_at' in data:
+                data['updated_at'] = entry['updated_at'].isoformat()
+        return data
+
+    def flush(self, force=True):
+        """把缓冲写入数据库
+
+        force=False 时只写入已空闲 flush_interval 秒或缓冲超过 max_delay 秒的条目。
+        返回实际写入的文章数量。
+        """
+        from models.article import Article
+        from services.changes import record_change
+
+        with self._flush_lock:
+            now = time.monotonic()
+            # 写入期间条目保留在缓冲中，读取仍能看到最新版本；这里只取快照
+            with self._lock:
+                flush_all = force or len(self._pending) >= self.max_pending
+                batch = {}
+                for article_id, entry in self._pending.items():
+                    idle = now - entry['last_buffered'] >= self.flush_interval
+                    if flush_all or idle or now - entry['first_buffered'] >= self.max_delay:
+                        batch[article_id] = dict(entry)
+            if not batch:
+                return 0
+
+            with self.app.app_context():
+                try:
+                    articles = (Article.query
+                                .options(db.undefer(Article.content))
+                                .filter(Article.id.in_(list(batch.keys())))
+                                .all())
+                    for article in articles:
+                        entry = batch[article.id]
+                        article.title = entry['title']
+                        if article.content != entry['content']:
+                            article.set_content(entry['content'])
+                        article.updated_at = entry['updated_at']
+                        record_change('article', article.id, 'update', article.parent_id, {'title': article.title})
+                    db.session.commit()
+                except Exception:
+                    # 条目仍在缓冲中，下次重试
+                    db.session.rollback()
+                    raise
+
+            # 只移除写入期间没有再修改的条目，有新修改的留待下次写入
+            with self._lock:
+                for article_id, snapshot in batch.items():
+                    entry = self._pending.get(article_id)
+                    if entry is not None and entry['version'] == snapshot['version']:
+                        del self._pending[article_id]
+            return len(articles)
+
+    def shutdown(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._pending:
+            self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush(force=False)
+            except Exception as e:
+                self.app.logger.error(f'文章缓冲写入失败: {str(e)}')
+
+
+article_write_buffer = ArticleWriteBuffer()